@@ -0,0 +1,157 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+import trajectory
+
+
+@pytest.fixture(autouse=True)
+def assets(tmp_path, monkeypatch):
+    monkeypatch.setattr(trajectory, "ASSETS_PATH", str(tmp_path))
+    trajectory.clear_cache()
+    yield tmp_path
+    trajectory.clear_cache()
+
+
+def write_gesture(assets, name, columns):
+    pd.DataFrame(columns).to_excel(os.path.join(assets, name + ".xlsx"), index=False)
+
+
+def kinds(violations, joint):
+    return [violation.kind for violation in violations if violation.joint == joint]
+
+
+def test_resample_hits_both_endpoints():
+    times = np.array([0.0, 1.53])
+    values = np.array([[0.0], [1.53]])
+    grid, positions = trajectory.resample(times, values, 50.0)
+    assert grid[0] == 0.0 and grid[-1] == 1.53
+    assert np.allclose(np.diff(grid)[:-1], 0.02)
+    assert np.allclose(positions[:, 0], grid)
+
+
+def test_resample_on_exact_ticks_adds_no_extra_sample():
+    grid, _ = trajectory.resample(np.array([0.0, 1.0]), np.array([[0.0], [1.0]]), 20.0)
+    assert len(grid) == 21
+    assert grid[-1] == 1.0
+
+
+def test_last_keyframe_is_streamed(assets):
+    write_gesture(assets, "wave", {"time": [0.0, 1.53], "HeadYaw": [0.0, 1.0]})
+    tr = trajectory.get_trajectory("wave", "nao")
+    assert tr.times[-1] == pytest.approx(1.53)
+    assert tr.positions[-1, tr.joint_names.index("HeadYaw")] == pytest.approx(1.0)
+
+
+def test_positions_are_clamped_and_flagged(assets):
+    write_gesture(assets, "wave", {"time": [0.0, 1.0, 2.0], "HeadYaw": [0.0, 2.0, 0.0]})
+    tr = trajectory.get_trajectory("wave", "mykeepon")
+    pan = tr.positions[:, tr.joint_names.index("pan")]
+    assert pan.max() == pytest.approx(1.5708)
+    assert "position" in kinds(tr.violations, "pan")
+
+
+def test_breach_between_grid_samples_is_flagged(assets):
+    write_gesture(assets, "flick", {"time": [0.0, 0.01, 0.1], "HeadYaw": [0.0, 3.0, 0.0]})
+    tr = trajectory.get_trajectory("flick", "mykeepon")
+    assert "position" in kinds(tr.violations, "pan")
+    assert "velocity" in kinds(tr.violations, "pan")
+
+
+def test_rate_limited_joint_reaches_final_pose(assets):
+    write_gesture(assets, "swing", {"time": [0.0, 0.1], "HeadYaw": [0.0, 1.5]})
+    tr = trajectory.get_trajectory("swing", "mykeepon")
+    pan = tr.positions[:, tr.joint_names.index("pan")]
+    assert pan[-1] == pytest.approx(1.5)
+    assert np.all(np.abs(np.diff(pan)) / np.diff(tr.times) <= 3.0 + 1e-9)
+    assert np.allclose(np.diff(tr.times), 1 / 20.0)
+    assert "velocity" in kinds(tr.violations, "pan")
+
+
+def test_limit_velocity_leaves_slow_trajectories_alone():
+    times = np.arange(5) / 10.0
+    positions = np.linspace(0.0, 0.1, 5)[:, np.newaxis]
+    new_times, limited = trajectory.limit_velocity(times, positions, np.array([1.0]), 10.0)
+    assert new_times is times and limited is positions
+
+
+def test_blank_cells_are_interpolated_and_flagged(assets):
+    write_gesture(assets, "gap", {"time": [0.0, 1.0, 2.0], "HeadYaw": [0.0, None, 1.0]})
+    tr = trajectory.get_trajectory("gap", "nao")
+    assert np.isfinite(tr.positions).all()
+    head_yaw = tr.positions[:, tr.joint_names.index("HeadYaw")]
+    assert head_yaw[np.argmin(np.abs(tr.times - 1.0))] == pytest.approx(0.5)
+    assert "gap" in kinds(tr.violations, "HeadYaw")
+
+
+def test_missing_joints_are_never_commanded(assets):
+    write_gesture(assets, "nod", {"time": [0.0, 1.0], "HeadPitch": [0.0, 0.2]})
+    tr = trajectory.get_trajectory("nod", "cozmo")
+    assert tr.joint_names == ("head",)
+    assert tr.positions.shape == (len(tr.times), 1)
+    assert all(set(frame) == {"head"} for _, frame in tr.frames())
+    assert tr.missing == ["lift"]
+    assert tr.ok
+
+
+def test_single_row_table(assets):
+    write_gesture(assets, "pose", {"time": [0.0], "HeadYaw": [0.5]})
+    tr = trajectory.get_trajectory("pose", "nao")
+    assert tr.positions.shape == (1, len(tr.joint_names))
+    assert list(tr.frames())[0][1]["HeadYaw"] == pytest.approx(0.5)
+
+
+def test_time_only_table_and_notes_column(assets):
+    write_gesture(assets, "still", {"time": [0.0, 1.0], "notes": ["start", "end"]})
+    tr = trajectory.get_trajectory("still", "nao")
+    assert tr.joint_names == ()
+    assert tr.positions.shape == (len(tr.times), 0)
+    assert tr.missing == list(trajectory.ROBOT_PROFILES["nao"].joint_names)
+    assert tr.ok
+
+
+def test_table_without_time_column_is_rejected(assets):
+    write_gesture(assets, "untimed", {"HeadYaw": [0.0, 0.5]})
+    with pytest.raises(ValueError):
+        trajectory.get_trajectory("untimed", "nao")
+    report = trajectory.validate_library(robots=["nao"])
+    assert [violation.kind for violation in report[("untimed", "nao")]] == ["unreadable"]
+
+
+def test_validate_library_reports_unreadable_files(assets, monkeypatch):
+    reads = []
+    read_excel = pd.read_excel
+    monkeypatch.setattr(trajectory.pd, "read_excel", lambda path: reads.append(path) or read_excel(path))
+    write_gesture(assets, "wave", {"time": [0.0, 1.0], "HeadYaw": [0.0, 0.5]})
+    write_gesture(assets, "empty", {"time": [], "HeadYaw": []})
+    with open(os.path.join(assets, "broken.xlsx"), "w") as broken:
+        broken.write("not a spreadsheet")
+    report = trajectory.validate_library()
+    assert len(report) == 3 * len(trajectory.ROBOT_PROFILES)
+    assert [violation.kind for violation in report[("broken", "nao")]] == ["unreadable"]
+    assert [violation.kind for violation in report[("empty", "nao")]] == ["unreadable"]
+    assert report[("wave", "stickman")] == []
+    assert len(reads) == 3
+
+
+def test_validate_library_normalises_robot_names(assets):
+    write_gesture(assets, "wave", {"time": [0.0, 1.0], "HeadYaw": [0.0, 0.5]})
+    report = trajectory.validate_library(robots=["NAO"])
+    assert list(report) == [("wave", "nao")]
+    with pytest.raises(ValueError):
+        trajectory.validate_library(robots=["nao", "wall-e"])
+
+
+def test_trajectories_are_cached_until_the_file_changes(assets):
+    write_gesture(assets, "wave", {"time": [0.0, 1.0], "HeadYaw": [0.0, 0.5]})
+    first = trajectory.get_trajectory("wave", "nao")
+    assert trajectory.get_trajectory("wave", "nao") is first
+
+    write_gesture(assets, "wave", {"time": [0.0, 1.0], "HeadYaw": [0.0, 1.0]})
+    path = os.path.join(assets, "wave.xlsx")
+    mtime = os.path.getmtime(path) + 10
+    os.utime(path, (mtime, mtime))
+    second = trajectory.get_trajectory("wave", "nao")
+    assert second is not first
+    assert second.positions[-1, second.joint_names.index("HeadYaw")] == pytest.approx(1.0)
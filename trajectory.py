@@ -0,0 +1,283 @@
+import os
+import zipfile
+import numpy as np
+import pandas as pd
+
+
+# Defaults and Constants
+ASSETS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets')
+TIME_COLUMN = "time"
+
+
+class RobotProfile:
+    def __init__(self, rate, joints):
+        # joints: robot joint -> (gesture column, lower limit, upper limit, max velocity)
+        self.rate = rate
+        self.joint_names = tuple(joints)
+        self.sources = tuple(spec[0] for spec in joints.values())
+        self.lower = np.array([spec[1] for spec in joints.values()], dtype=float)
+        self.upper = np.array([spec[2] for spec in joints.values()], dtype=float)
+        self.max_velocity = np.array([spec[3] for spec in joints.values()], dtype=float)
+
+
+NAO_ARMS = {
+    "HeadYaw":        ("HeadYaw",        -2.0857, 2.0857, 8.26),
+    "HeadPitch":      ("HeadPitch",      -0.6720, 0.5149, 7.19),
+    "LShoulderPitch": ("LShoulderPitch", -2.0857, 2.0857, 8.26),
+    "LShoulderRoll":  ("LShoulderRoll",  -0.3142, 1.3265, 7.19),
+    "LElbowYaw":      ("LElbowYaw",      -2.0857, 2.0857, 8.26),
+    "LElbowRoll":     ("LElbowRoll",     -1.5446, -0.0349, 7.19),
+    "RShoulderPitch": ("RShoulderPitch", -2.0857, 2.0857, 8.26),
+    "RShoulderRoll":  ("RShoulderRoll",  -1.3265, 0.3142, 7.19),
+    "RElbowYaw":      ("RElbowYaw",      -2.0857, 2.0857, 8.26),
+    "RElbowRoll":     ("RElbowRoll",      0.0349, 1.5446, 7.19),
+}
+
+PEPPER_ARMS = {
+    "HeadYaw":        ("HeadYaw",        -2.0857, 2.0857, 7.33),
+    "HeadPitch":      ("HeadPitch",      -0.7068, 0.6371, 9.23),
+    "LShoulderPitch": ("LShoulderPitch", -2.0857, 2.0857, 7.33),
+    "LShoulderRoll":  ("LShoulderRoll",   0.0087, 1.5620, 9.23),
+    "LElbowYaw":      ("LElbowYaw",      -2.0857, 2.0857, 7.33),
+    "LElbowRoll":     ("LElbowRoll",     -1.5620, -0.0087, 9.23),
+    "RShoulderPitch": ("RShoulderPitch", -2.0857, 2.0857, 7.33),
+    "RShoulderRoll":  ("RShoulderRoll",  -1.5620, -0.0087, 9.23),
+    "RElbowYaw":      ("RElbowYaw",      -2.0857, 2.0857, 7.33),
+    "RElbowRoll":     ("RElbowRoll",      0.0087, 1.5620, 9.23),
+}
+
+ROBOT_PROFILES = {
+    # The stickman is rendered on screen, so it only needs wide limits
+    "stickman": RobotProfile(30.0, {joint: (source, -np.pi, np.pi, 4 * np.pi)
+                                    for joint, (source, _, _, _) in NAO_ARMS.items()}),
+    "pepper": RobotProfile(50.0, PEPPER_ARMS),
+    "nao": RobotProfile(50.0, NAO_ARMS),
+    "cozmo": RobotProfile(30.0, {
+        "head": ("HeadPitch",      -0.4363, 0.7854, 3.0),
+        "lift": ("RShoulderPitch", -0.2000, 1.0000, 2.0),
+    }),
+    "mykeepon": RobotProfile(20.0, {
+        "pan":  ("HeadYaw",       -1.5708, 1.5708, 3.0),
+        "tilt": ("HeadPitch",     -0.5236, 0.5236, 2.0),
+        "side": ("LShoulderRoll", -0.5236, 0.5236, 2.0),
+    }),
+}
+
+
+class Violation:
+    def __init__(self, joint, kind, count, worst, detail=""):
+        # kind is one of "gap", "position", "velocity" or "unreadable"
+        self.joint = joint
+        self.kind = kind
+        self.count = count
+        self.worst = worst
+        self.detail = detail
+
+    def __repr__(self):
+        if self.detail:
+            return f"Violation({self.joint!r}, {self.kind!r}, {self.detail!r})"
+        return f"Violation({self.joint!r}, {self.kind!r}, count={self.count}, worst={self.worst:.4f})"
+
+
+class Trajectory:
+    def __init__(self, gesture, robot, rate, times, joint_names, positions, violations, missing):
+        # Robot joints the gesture has no column for are never commanded and listed in missing
+        self.gesture = gesture
+        self.robot = robot
+        self.rate = rate
+        self.times = times
+        self.joint_names = joint_names
+        self.positions = positions
+        self.violations = violations
+        self.missing = missing
+
+    @property
+    def ok(self):
+        return not self.violations
+
+    def frames(self):
+        # Yields (time, {joint: angle}) tuples at the robot's control rate
+        for t, row in zip(self.times, self.positions):
+            yield float(t), dict(zip(self.joint_names, row.tolist()))
+
+
+_keyframe_cache = {}
+_trajectory_cache = {}
+
+
+def get_gesture_path(gesture):
+    return os.path.join(ASSETS_PATH, gesture + ".xlsx")
+
+
+def fill_gaps(times, column):
+    # Blank or non-numeric cells are interpolated from the joint's own keyframes
+    valid = np.isfinite(column)
+    if valid.all():
+        return column, 0
+    return np.interp(times, times[valid], column[valid]), int((~valid).sum())
+
+
+def load_keyframes(gesture):
+    path = get_gesture_path(gesture)
+    mtime = os.path.getmtime(path)
+    cached = _keyframe_cache.get(gesture)
+    if cached is not None and cached[0] == mtime:
+        return cached[1], cached[2], cached[3]
+
+    table = pd.read_excel(path)
+    table.columns = [str(column).strip() for column in table.columns]
+    if TIME_COLUMN not in table.columns:
+        raise ValueError(f"Gesture {gesture!r} has no {TIME_COLUMN!r} column")
+    table[TIME_COLUMN] = pd.to_numeric(table[TIME_COLUMN], errors='coerce')
+    table = table[np.isfinite(table[TIME_COLUMN])]
+    table = table.sort_values(TIME_COLUMN).drop_duplicates(TIME_COLUMN)
+    times = table.pop(TIME_COLUMN).to_numpy(dtype=float)
+    if not len(times):
+        raise ValueError(f"Gesture {gesture!r} has no keyframes")
+
+    keyframes = {}
+    gaps = {}
+    for column in table.columns:
+        values = pd.to_numeric(table[column], errors='coerce').to_numpy(dtype=float)
+        # Columns without a single number (e.g. notes) are not joints
+        if not np.isfinite(values).any():
+            continue
+        keyframes[column], gaps[column] = fill_gaps(times, values)
+
+    # Any robot trajectory built from an older version of this file is stale now
+    for key in [key for key in _trajectory_cache if key[0] == gesture]:
+        del _trajectory_cache[key]
+    _keyframe_cache[gesture] = (mtime, times, keyframes, gaps)
+    return times, keyframes, gaps
+
+
+def map_joints(times, keyframes, profile):
+    # Builds a (keyframes x mapped joints) matrix in the robot's joint order
+    mapped = [index for index, source in enumerate(profile.sources) if source in keyframes]
+    values = np.zeros((len(times), len(mapped)))
+    for column, index in enumerate(mapped):
+        values[:, column] = keyframes[profile.sources[index]]
+    missing = [joint for index, joint in enumerate(profile.joint_names) if index not in mapped]
+    return np.array(mapped, dtype=int), values, missing
+
+
+def resample(times, values, rate):
+    # Linear interpolation of all joints at once onto a uniform time grid
+    if len(times) < 2:
+        return times.copy(), values.copy()
+    count = int(np.floor((times[-1] - times[0]) * rate + 1e-9)) + 1
+    grid = times[0] + np.arange(count) / rate
+    # The last keyframe is always streamed, even if it falls between two ticks
+    if times[-1] - grid[-1] > 1e-9:
+        grid = np.append(grid, times[-1])
+    else:
+        grid[-1] = times[-1]
+    upper = np.clip(np.searchsorted(times, grid, side='right'), 1, len(times) - 1)
+    lower = upper - 1
+    weight = ((grid - times[lower]) / (times[upper] - times[lower]))[:, np.newaxis]
+    return grid, values[lower] + weight * (values[upper] - values[lower])
+
+
+def limit_velocity(times, positions, max_velocity, rate):
+    # Rate limiter that only walks the samples once a step is too large
+    if len(positions) > 1:
+        max_step = np.diff(times)[:, np.newaxis] * max_velocity
+        too_fast = (np.abs(np.diff(positions, axis=0)) > max_step + 1e-12).any(axis=1)
+        if too_fast.any():
+            target = positions
+            positions = positions.copy()
+            for index in range(int(np.argmax(too_fast)) + 1, len(positions)):
+                step = max_step[index - 1]
+                positions[index] = positions[index - 1] + np.clip(target[index] - positions[index - 1], -step, step)
+
+            # Keep streaming at the control rate until every joint has reached its final pose
+            remaining = target[-1] - positions[-1]
+            ticks = int(np.ceil((np.abs(remaining) * rate / max_velocity).max() - 1e-9))
+            if ticks > 0:
+                reach = np.arange(1, ticks + 1)[:, np.newaxis] * (max_velocity / rate)
+                tail = positions[-1] + np.clip(remaining, -reach, reach)
+                tail[-1] = target[-1]
+                times = np.append(times, times[-1] + np.arange(1, ticks + 1) / rate)
+                positions = np.vstack([positions, tail])
+    return times, positions
+
+
+def find_violations(profile, mapped, times, values, gaps):
+    # Checked on the keyframes themselves, where a linear trajectory has its extremes
+    violations = []
+    lower, upper, max_velocity = profile.lower[mapped], profile.upper[mapped], profile.max_velocity[mapped]
+
+    overshoot = np.maximum(values - upper, lower - values)
+    position_count = (overshoot > 0).sum(axis=0)
+
+    if len(values) > 1:
+        velocity = np.abs(np.diff(values, axis=0)) / np.diff(times)[:, np.newaxis]
+        velocity_excess = velocity - max_velocity
+    else:
+        velocity_excess = np.zeros((1, len(mapped)))
+    velocity_count = (velocity_excess > 0).sum(axis=0)
+
+    for index, joint_index in enumerate(mapped):
+        joint = profile.joint_names[joint_index]
+        gap_count = gaps.get(profile.sources[joint_index], 0)
+        if gap_count:
+            violations.append(Violation(joint, "gap", gap_count, 0.0))
+        if position_count[index]:
+            violations.append(Violation(joint, "position", int(position_count[index]),
+                                        float(overshoot[:, index].max())))
+        if velocity_count[index]:
+            violations.append(Violation(joint, "velocity", int(velocity_count[index]),
+                                        float(velocity_excess[:, index].max())))
+    return violations
+
+
+def get_trajectory(gesture, robot):
+    robot = robot.lower()
+    profile = ROBOT_PROFILES[robot]
+    times, keyframes, gaps = load_keyframes(gesture)
+
+    key = (gesture, robot)
+    if key in _trajectory_cache:
+        return _trajectory_cache[key]
+
+    mapped, values, missing = map_joints(times, keyframes, profile)
+    violations = find_violations(profile, mapped, times, values, gaps)
+    grid, positions = resample(times, values, profile.rate)
+
+    # Clamp to the joint range first, so the rate limiter only moves between valid positions
+    positions = np.clip(positions, profile.lower[mapped], profile.upper[mapped])
+    grid, positions = limit_velocity(grid, positions, profile.max_velocity[mapped], profile.rate)
+
+    joint_names = tuple(profile.joint_names[index] for index in mapped)
+    trajectory = Trajectory(gesture, robot, profile.rate, grid, joint_names, positions, violations, missing)
+    _trajectory_cache[key] = trajectory
+    return trajectory
+
+
+def validate_library(gestures=None, robots=None):
+    # Returns {(gesture, robot): violations} for every gesture on every robot
+    if gestures is None:
+        gestures = [os.path.splitext(name)[0] for name in sorted(os.listdir(ASSETS_PATH))
+                    if os.path.splitext(name)[1] == ".xlsx"] if os.path.exists(ASSETS_PATH) else []
+    robots = list(ROBOT_PROFILES) if robots is None else [robot.lower() for robot in robots]
+    unknown = [robot for robot in robots if robot not in ROBOT_PROFILES]
+    if unknown:
+        raise ValueError(f"Unknown robot names: {', '.join(unknown)}")
+
+    report = {}
+    for gesture in gestures:
+        try:
+            load_keyframes(gesture)
+        except (OSError, ValueError, zipfile.BadZipFile) as error:
+            # One broken file must not stop the rest of the library from being checked
+            for robot in robots:
+                report[(gesture, robot)] = [Violation(None, "unreadable", 0, 0.0, detail=str(error))]
+            continue
+        for robot in robots:
+            report[(gesture, robot)] = get_trajectory(gesture, robot).violations
+    return report
+
+
+def clear_cache():
+    _keyframe_cache.clear()
+    _trajectory_cache.clear()